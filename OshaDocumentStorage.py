@@ -3,8 +3,20 @@
 
 import os
 import re
+import json
+import hashlib
+import pathlib
+import itertools
+import functools
+import asyncio
+import queue
+import aiohttp
+import requests
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import chromadb
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
@@ -14,17 +26,131 @@ from langchain.schema import Document
 from web_content_scraper import WebContentScraper
 from pdf_content_processor import PDFContentProcessor
 
+try:
+    from semantic_text_splitter import TextSplitter as SemanticTextSplitter
+    SEMANTIC_SPLITTER_AVAILABLE = True
+except ImportError:
+    SEMANTIC_SPLITTER_AVAILABLE = False
 
-# Load environment variables from .env file
-load_dotenv()
-VectorDBPath = os.getenv("VECTOR_DB_PATH")
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+@functools.lru_cache(maxsize=1)
+def _get_vector_db_path() -> Optional[str]:
+    """Load environment variables once and return the configured DB path."""
+    load_dotenv()
+    return os.getenv("VECTOR_DB_PATH")
+
+# Shared HTTP session so batched embedding requests reuse one connection
+_EMBED_SESSION = requests.Session()
+
+# Single compiled alternation covering the OSHA parts we recognize:
+# 1910 General Industry, 1926 Construction, 1915 Maritime,
+# 1917 Marine Terminals, 1918 Longshoring
+_REG_RE = re.compile(r'19(?:10|26|15|17|18)\.\d+')
+
+# Regulation part prefix -> regulation type
+_PART_TO_TYPE = {
+    "1910": "general_industry",
+    "1926": "construction",
+    "1915": "maritime",
+    "1917": "marine_terminals",
+    "1918": "longshoring"
+}
+
+
+def _sanitize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten metadata down to the scalar types Chroma accepts.
+
+    Scalars pass through untouched; anything nested (e.g. the scraper's
+    table-header lists) is serialized to a compact JSON string, via orjson
+    when available since it is several times faster than stdlib json on the
+    small dicts this runs on once per chunk.
+    """
+    clean: Dict[str, Any] = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            clean[key] = value
+        elif ORJSON_AVAILABLE:
+            clean[key] = orjson.dumps(value).decode()
+        else:
+            clean[key] = json.dumps(value, separators=(",", ":"))
+    return clean
+
+
+def _process_pdf_worker(pdf_path: str,
+                        content_selectors: Optional[Dict[str, Any]] = None,
+                        max_pages: Optional[int] = None) -> List[Document]:
+    """Process one PDF in a worker process (top-level so it can be pickled)."""
+    processor = PDFContentProcessor()
+    return processor.process_pdf(
+        pdf_path,
+        content_selectors=content_selectors,
+        max_pages=max_pages
+    )
+
+
+class BatchedOllamaEmbeddings(OllamaEmbeddings):
+    """OllamaEmbeddings that batches texts through the native /api/embed endpoint.
+
+    Ollama v0.1.35+ accepts a list of inputs per request, so embedding N chunks
+    costs ceil(N / batch_size) HTTP round-trips instead of N. Older servers
+    without /api/embed fall back to the sequential per-text path.
+    """
+
+    batch_size: int = 32
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in batches via /api/embed."""
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            batch_embeddings = None
+            try:
+                response = _EMBED_SESSION.post(
+                    f"{self.base_url}/api/embed",
+                    json={"model": self.model, "input": batch},
+                    timeout=600,
+                )
+                response.raise_for_status()
+                batch_embeddings = response.json().get("embeddings")
+            except Exception:
+                batch_embeddings = None
+            if batch_embeddings is None:
+                # Server predates /api/embed - use the sequential endpoint
+                batch_embeddings = super().embed_documents(batch)
+            embeddings.extend(batch_embeddings)
+        return embeddings
 
 
 class OSHADocumentProcessor:
     """OSHA-specific document processing and storage class."""
     
-    def __init__(self, base_url: str = "https://www.osha.gov"):
+    # Name of the Chroma collection that holds all OSHA content
+    COLLECTION_NAME = "osha"
+    
+    # Chunks shorter than this get merged into a same-source neighbor
+    MIN_CHUNK_CHARS = 100
+    # Upper bound on the size of a merged chunk
+    MAX_MERGED_CHARS = 550
+    
+    def __init__(self, base_url: str = "https://www.osha.gov",
+                 use_chroma_server: bool = False,
+                 chroma_host: str = "localhost",
+                 chroma_port: int = 8000):
         self.base_url = base_url
+        
+        # When enabled, ingest writes go to a Chroma server over the async
+        # HTTP client instead of the embedded PersistentClient
+        self.use_chroma_server = use_chroma_server
+        self.chroma_host = chroma_host
+        self.chroma_port = chroma_port
         self.web_scraper = WebContentScraper(base_url=base_url)
         self.pdf_processor = PDFContentProcessor()
         
@@ -39,33 +165,86 @@ class OSHADocumentProcessor:
             "osha_specific": ["div.regulation", "div.guidance", "div.compliance"]
         }
         
+        # OSHA-specific request headers, set once so every fetch through the
+        # scraper's pooled session carries them
+        self.web_scraper.set_custom_headers({
+            "Referer": self.base_url,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+        })
+        
         # OSHA-specific metadata
         self.osha_metadata = {
             "source_type": "osha_regulation",
             "agency": "OSHA",
             "jurisdiction": "federal"
         }
-
-    def fetch_osha_page(self, path: str) -> List[Document]:
-        """Fetch and parse an OSHA page with OSHA-specific processing."""
-        # Add OSHA-specific headers if needed
-        osha_headers = {
-            "Referer": self.base_url,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+        
+        # Content handlers for the shared ingest pipeline, keyed by route
+        self._handlers = {
+            "pdf": self._process_pdf_documents,
+            "web": self._fetch_web_documents
         }
-        self.web_scraper.set_custom_headers(osha_headers)
         
+        # Lazily constructed embeddings client, shared across ingest and search
+        self._embeddings = None
+        
+        # Normalized in-memory corpus per persist directory for the numpy
+        # brute-force search path
+        self._corpus_cache: Dict[str, Any] = {}
+        
+        # Opened Chroma vectorstores keyed by persist directory - client
+        # bootstrap reloads SQLite metadata and the HNSW index from disk,
+        # so pay it once per directory rather than once per search
+        self._vectorstore_cache: Dict[str, Chroma] = {}
+
+    @property
+    def embeddings(self) -> BatchedOllamaEmbeddings:
+        """Shared embeddings client, created on first use.
+
+        Constructing OllamaEmbeddings triggers a model probe on the Ollama
+        server, so reuse one instance instead of paying that handshake on
+        every ingest and search call.
+        """
+        if self._embeddings is None:
+            self._embeddings = BatchedOllamaEmbeddings(
+                model="nomic-embed-text",
+                base_url=os.getenv("OLLAMA_URL", "http://localhost:11434")
+            )
+        return self._embeddings
+
+    def fetch_osha_page(self, path: str,
+                        metadata_patch: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Fetch and parse an OSHA page with OSHA-specific processing.
+
+        All metadata (base OSHA keys plus regulation classification) is
+        applied in a single pass; callers may pass a pre-built patch to
+        avoid rebuilding it.
+        """
         # Fetch and parse with OSHA-specific selectors
         documents = self.web_scraper.fetch_and_parse(path, self.osha_content_selectors)
         
-        # Add OSHA-specific metadata to all documents
+        if metadata_patch is None:
+            metadata_patch = self._web_metadata_patch(path)
         for doc in documents:
-            doc.metadata.update(self.osha_metadata)
-            doc.metadata["osha_path"] = path
-            doc.metadata["content_type"] = "web_page"
+            doc.metadata.update(metadata_patch)
             
         return documents
 
+    def _web_metadata_patch(self, path: str) -> Dict[str, Any]:
+        """Build the complete metadata patch for documents scraped from a page."""
+        patch = {
+            **self.osha_metadata,
+            "osha_path": path,
+            "content_type": "web_page"
+        }
+        
+        regulation_number = self._extract_regulation_number(path)
+        if regulation_number:
+            patch["regulation_number"] = regulation_number
+            patch["regulation_type"] = self._classify_regulation(regulation_number[:4])
+        
+        return patch
+
     def process_osha_pdf(self, pdf_path: str, 
                          content_selectors: Optional[Dict[str, Any]] = None,
                          max_pages: Optional[int] = None) -> List[Document]:
@@ -80,204 +259,448 @@ class OSHADocumentProcessor:
             max_pages=max_pages
         )
         
-        # Add OSHA-specific metadata to all documents
+        return self._decorate_pdf_documents(documents, pdf_path)
+
+    def _decorate_pdf_documents(self, documents: List[Document], pdf_path: str) -> List[Document]:
+        """Add OSHA-specific metadata to documents extracted from a PDF."""
+        # Classify once per file, then apply the patch to every document
+        meta_patch = {
+            **self.osha_metadata,
+            "content_type": "pdf_document",
+            "pdf_path": pdf_path
+        }
+        
+        regulation_number = self._extract_regulation_number_from_filename(pdf_path)
+        if regulation_number:
+            meta_patch["regulation_number"] = regulation_number
+            meta_patch["regulation_type"] = self._classify_regulation(regulation_number[:4])
+        
         for doc in documents:
-            doc.metadata.update(self.osha_metadata)
-            doc.metadata["content_type"] = "pdf_document"
-            doc.metadata["pdf_path"] = pdf_path
-            
-            # Extract regulation number from filename if possible
-            regulation_number = self._extract_regulation_number_from_filename(pdf_path)
-            if regulation_number:
-                doc.metadata["regulation_number"] = regulation_number
-                doc.metadata["regulation_type"] = self._classify_regulation(regulation_number)
+            doc.metadata.update(meta_patch)
         
         return documents
 
     def _extract_regulation_number_from_filename(self, pdf_path: str) -> str:
         """Extract OSHA regulation number from PDF filename."""
-        filename = os.path.basename(pdf_path)
-        
-        # Common OSHA regulation patterns in filenames
-        patterns = [
-            r'1910\.(\d+)',  # General Industry
-            r'1926\.(\d+)',  # Construction
-            r'1915\.(\d+)',  # Maritime
-            r'1917\.(\d+)',  # Marine Terminals
-            r'1918\.(\d+)',  # Longshoring
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename)
-            if match:
-                return match.group(0)
-        return ""
+        match = _REG_RE.search(os.path.basename(pdf_path))
+        return match.group(0) if match else ""
 
     def process_osha_regulation(self, regulation_path: str) -> List[Document]:
         """Process a specific OSHA regulation with enhanced metadata."""
-        documents = self.fetch_osha_page(regulation_path)
-        
-        # Extract regulation number from path if possible
-        regulation_number = self._extract_regulation_number(regulation_path)
-        if regulation_number:
-            for doc in documents:
-                doc.metadata["regulation_number"] = regulation_number
-                doc.metadata["regulation_type"] = self._classify_regulation(regulation_path)
-        
-        return documents
+        return self.fetch_osha_page(
+            regulation_path, self._web_metadata_patch(regulation_path)
+        )
 
     def _extract_regulation_number(self, path: str) -> str:
         """Extract OSHA regulation number from path."""
-        # Common OSHA regulation patterns
-        patterns = [
-            r'1910\.(\d+)',  # General Industry
-            r'1926\.(\d+)',  # Construction
-            r'1915\.(\d+)',  # Maritime
-            r'1917\.(\d+)',  # Marine Terminals
-            r'1918\.(\d+)',  # Longshoring
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, path)
-            if match:
-                return match.group(0)
-        return ""
-
-    def _classify_regulation(self, path: str) -> str:
-        """Classify the type of OSHA regulation based on path."""
-        if "1910" in path:
-            return "general_industry"
-        elif "1926" in path:
-            return "construction"
-        elif "1915" in path:
-            return "maritime"
-        elif "1917" in path:
-            return "marine_terminals"
-        elif "1918" in path:
-            return "longshoring"
+        match = _REG_RE.search(path)
+        return match.group(0) if match else ""
+
+    def _classify_regulation(self, part: str) -> str:
+        """Classify an OSHA regulation by its part prefix (e.g. "1910")."""
+        return _PART_TO_TYPE.get(part, "other")
+
+    async def _afetch_osha_page(self, session: aiohttp.ClientSession, path: str) -> List[Document]:
+        """Fetch one OSHA page on the shared aiohttp session and parse it off-loop."""
+        if path.startswith(('http://', 'https://')):
+            url = path
         else:
-            return "other"
+            url = f"{self.base_url}{path}" if path.startswith("/") else f"{self.base_url}/{path}"
+        async with session.get(url, headers=self.web_scraper.headers) as response:
+            response.raise_for_status()
+            html = await response.text()
+        
+        # HTML parsing is CPU-bound - keep it off the event loop
+        return await asyncio.to_thread(
+            self.web_scraper.parse_to_documents, html, url, self.osha_content_selectors
+        )
 
-    def ingest_osha_documents(self, paths: List[str], persist_dir: str = None) -> str:
-        """Ingest multiple OSHA documents (web pages and PDFs) into vector database."""
-        if persist_dir is None:
-            persist_dir = VectorDBPath or "./osha_vector_db"
+    async def _gather_docs(self, paths: List[str]) -> List[Any]:
+        """Fetch multiple OSHA pages concurrently over one connection pool."""
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(
+                *[self._afetch_osha_page(session, path) for path in paths],
+                return_exceptions=True
+            )
+
+    def _fetch_web_documents(self, paths: List[str]) -> List[Document]:
+        """Fetch multiple OSHA web pages in parallel and decorate their metadata."""
+        documents = []
+        results = asyncio.run(self._gather_docs(paths))
         
-        all_documents = []
+        for path, result in zip(paths, results):
+            if isinstance(result, BaseException):
+                print(f"  - Error processing web page {path}: {result}")
+                continue
+            
+            # Apply the same metadata decoration as the sequential path
+            meta_patch = self._web_metadata_patch(path)
+            for doc in result:
+                doc.metadata.update(meta_patch)
+            
+            print(f"  - {path}: {len(result)} chunks")
+            documents.extend(result)
         
-        for path in paths:
+        return documents
+
+    def _process_pdf_documents(self, pdf_paths: List[str]) -> List[Document]:
+        """Process multiple PDFs across worker processes.
+
+        PDF text extraction is CPU-bound, so each file runs in its own process
+        and the OSHA metadata decoration happens in the parent once results
+        come back.
+        """
+        documents = []
+        
+        if len(pdf_paths) == 1:
+            # A single file is not worth the process-startup overhead
             try:
-                print(f"Processing OSHA path: {path}")
-                
-                if path.lower().endswith('.pdf'):
-                    # Process as PDF
-                    docs = self.process_osha_pdf(path)
-                    print(f"  - Extracted {len(docs)} PDF document chunks")
-                else:
-                    # Process as web page
-                    docs = self.process_osha_regulation(path)
-                    print(f"  - Extracted {len(docs)} web page document chunks")
-                
-                all_documents.extend(docs)
-                
+                docs = self.process_osha_pdf(pdf_paths[0])
+                print(f"  - {pdf_paths[0]}: {len(docs)} chunks")
+                documents.extend(docs)
             except Exception as e:
-                print(f"  - Error processing {path}: {e}")
+                print(f"  - Error processing PDF {pdf_paths[0]}: {e}")
+            return documents
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = {
+                executor.submit(_process_pdf_worker, path, None, None): path
+                for path in pdf_paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    docs = self._decorate_pdf_documents(future.result(), path)
+                    print(f"  - {path}: {len(docs)} chunks")
+                    documents.extend(docs)
+                except Exception as e:
+                    print(f"  - Error processing PDF {path}: {e}")
+        
+        return documents
+
+    @staticmethod
+    def _route(path: str) -> str:
+        """Route a path to the content handler that should process it."""
+        return "pdf" if path.lower().endswith(".pdf") else "web"
+
+    def _ingest(self, paths: List[str], persist_dir: str = None,
+                batch_size: int = 250) -> str:
+        """Shared ingest pipeline for any mix of web pages and PDFs.
+
+        Paths are grouped by handler, fetched/processed in bulk, and fed
+        through the single split/embed/store pipeline so optimizations apply
+        to every content type in one place.
+        """
+        if persist_dir is None:
+            persist_dir = _get_vector_db_path() or "./osha_vector_db"
+        
+        grouped: Dict[str, List[str]] = {}
+        for path in paths:
+            grouped.setdefault(self._route(path), []).append(path)
+        
+        all_documents = []
+        for kind, handler in self._handlers.items():
+            kind_paths = grouped.get(kind)
+            if not kind_paths:
+                continue
+            print("Processing PDFs..." if kind == "pdf" else "Processing web pages...")
+            all_documents.extend(handler(kind_paths))
         
         if not all_documents:
             print("No documents to process")
             return persist_dir
         
-        # Split into chunks
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500, 
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        # Split, embed, and store in fixed-size streaming batches
+        total_chunks = self._store_chunks(
+            self._iter_chunks(all_documents), persist_dir, batch_size
         )
-        chunks = splitter.split_documents(all_documents)
-        
-        # Create embeddings
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
         
-        # Store in Chroma DB
-        vectorstore = Chroma.from_documents(
-            chunks,
-            embeddings,
-            persist_directory=persist_dir
-        )
-        vectorstore.persist()
-        
-        print(f"Successfully ingested {len(chunks)} chunks into {persist_dir}")
+        print(f"Successfully ingested {total_chunks} chunks into {persist_dir}")
         return persist_dir
 
+    def ingest_osha_documents(self, paths: List[str], persist_dir: str = None,
+                              batch_size: int = 250) -> str:
+        """Ingest multiple OSHA documents (web pages and PDFs) into vector database."""
+        return self._ingest(paths, persist_dir, batch_size)
+
     def ingest_mixed_osha_content(self, web_paths: List[str] = None, 
                                  pdf_paths: List[str] = None,
-                                 persist_dir: str = None) -> str:
+                                 persist_dir: str = None,
+                                 batch_size: int = 250) -> str:
         """Ingest a mix of web pages and PDFs with separate processing."""
-        if persist_dir is None:
-            persist_dir = VectorDBPath or "./osha_vector_db"
+        return self._ingest((web_paths or []) + (pdf_paths or []), persist_dir, batch_size)
+
+    def _iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Stream documents through the splitter one at a time.
+
+        The Rust-backed semantic_text_splitter is both faster than the
+        character-based Python splitter and produces chunks sized in tokens,
+        matching the embedding model's context window. Falls back to
+        RecursiveCharacterTextSplitter when it is not installed. Splitting
+        lazily keeps peak memory at roughly one store batch of chunks rather
+        than the whole corpus plus all of its chunks.
+        """
+        split = None
+        if SEMANTIC_SPLITTER_AVAILABLE:
+            # from_tiktoken_model wants a model name, not an encoding name;
+            # gpt-3.5-turbo maps to the cl100k_base tokenizer. Fall back to
+            # the character splitter if the binding rejects it
+            try:
+                splitter = SemanticTextSplitter.from_tiktoken_model(
+                    "gpt-3.5-turbo", capacity=400, overlap=40
+                )
+                split = splitter.chunks
+            except Exception:
+                split = None
+        if split is None:
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=500, 
+                chunk_overlap=50,
+                separators=["\n\n", "\n", ". ", " ", ""]
+            )
+            split = splitter.split_text
         
-        all_documents = []
+        def raw_chunks() -> Iterator[Document]:
+            for doc in documents:
+                for chunk_text in split(doc.page_content):
+                    yield Document(
+                        page_content=chunk_text,
+                        metadata=doc.metadata.copy()
+                    )
         
-        # Process web pages
-        if web_paths:
-            print("Processing web pages...")
-            for path in web_paths:
-                try:
-                    docs = self.process_osha_regulation(path)
-                    all_documents.extend(docs)
-                    print(f"  - {path}: {len(docs)} chunks")
-                except Exception as e:
-                    print(f"  - Error processing web page {path}: {e}")
+        return self._merge_small_chunks(raw_chunks())
+
+    def _merge_small_chunks(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Fold tiny chunks into their next same-source neighbor.
+
+        Scraped OSHA HTML splits into many sub-100-char fragments (headings,
+        list items, footer text), and each one would otherwise cost its own
+        embedding call and vector-DB row. Whitespace-only chunks are dropped.
+        """
+        def source_of(chunk: Document) -> Any:
+            metadata = chunk.metadata
+            return (metadata.get("osha_path")
+                    or metadata.get("pdf_path")
+                    or metadata.get("source"))
         
-        # Process PDFs
-        if pdf_paths:
-            print("Processing PDFs...")
-            for pdf_path in pdf_paths:
-                try:
-                    docs = self.process_osha_pdf(pdf_path)
-                    all_documents.extend(docs)
-                    print(f"  - {pdf_path}: {len(docs)} chunks")
-                except Exception as e:
-                    print(f"  - Error processing PDF {pdf_path}: {e}")
+        pending: Optional[Document] = None
         
-        if not all_documents:
-            print("No documents to process")
-            return persist_dir
+        for chunk in chunks:
+            text = chunk.page_content.strip()
+            if not text:
+                continue
+            chunk.page_content = text
+            
+            if pending is not None:
+                if (source_of(pending) == source_of(chunk)
+                        and len(pending.page_content) + len(text) + 1 <= self.MAX_MERGED_CHARS):
+                    chunk.page_content = f"{pending.page_content}\n{text}"
+                else:
+                    yield pending
+                pending = None
+            
+            if len(chunk.page_content) < self.MIN_CHUNK_CHARS:
+                pending = chunk
+            else:
+                yield chunk
+        
+        if pending is not None:
+            yield pending
+
+    def _store_chunks(self, chunks: Iterable[Document], persist_dir: str,
+                      batch_size: int = 250) -> int:
+        """Embed chunks and insert them into Chroma in large batches.
+
+        Chroma.from_documents embeds and inserts documents one at a time;
+        pre-computing embeddings and adding them in large batches amortizes
+        the per-insert SQLite transaction cost. Accepts any iterable and
+        consumes it batch by batch, returning the number of chunks stored.
+        """
+        if self.use_chroma_server:
+            total = asyncio.run(self._astore_chunks(chunks, batch_size))
+            self._corpus_cache.pop(persist_dir, None)
+            return total
         
-        # Split into chunks
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500, 
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        client = chromadb.PersistentClient(path=persist_dir)
+        collection = client.get_or_create_collection(
+            self.COLLECTION_NAME,
+            metadata={"hnsw:space": "cosine"}
         )
-        chunks = splitter.split_documents(all_documents)
         
-        # Create embeddings
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
+        # Chroma rejects adds above the client's max batch size, so the
+        # pipeline's batches are written in right-sized sub-batches
+        try:
+            max_batch = client.get_max_batch_size()
+        except Exception:
+            max_batch = 128
+        
+        # Embedding (Ollama round-trip) and inserting (SQLite transaction +
+        # HNSW update) use independent resources, so overlap them: the main
+        # thread embeds while a single consumer thread drains inserts. The
+        # bounded queue keeps at most a few batches in memory.
+        batch_queue: queue.Queue = queue.Queue(maxsize=4)
+        
+        def _drain_inserts() -> None:
+            while True:
+                batch = batch_queue.get()
+                if batch is None:
+                    return
+                for i in range(0, len(batch["ids"]), max_batch):
+                    collection.add(**{
+                        key: values[i:i + max_batch]
+                        for key, values in batch.items()
+                    })
         
-        # Store in Chroma DB
-        vectorstore = Chroma.from_documents(
-            chunks,
-            embeddings,
-            persist_directory=persist_dir
+        embed_cache_dir = pathlib.Path(persist_dir) / "embed_cache"
+        chunk_iter = iter(chunks)
+        total = 0
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            inserter = executor.submit(_drain_inserts)
+            
+            def _put_or_abort(item: Optional[Dict[str, Any]]) -> bool:
+                """Put on the bounded queue, polling the inserter.
+
+                If the inserter died on a failed add, nobody drains the
+                queue and a plain blocking put would deadlock; polling
+                lets the producer notice and stop so inserter.result()
+                can re-raise the real error.
+                """
+                while not inserter.done():
+                    try:
+                        batch_queue.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            
+            try:
+                while True:
+                    batch = list(itertools.islice(chunk_iter, batch_size))
+                    if not batch:
+                        break
+                    texts = [chunk.page_content for chunk in batch]
+                    batch_embeddings = self._embed_texts_cached(texts, embed_cache_dir)
+                    stored = _put_or_abort({
+                        "ids": [self._chunk_id(text, total + i) for i, text in enumerate(texts)],
+                        "documents": texts,
+                        "metadatas": [_sanitize_metadata(chunk.metadata) for chunk in batch],
+                        "embeddings": batch_embeddings
+                    })
+                    if not stored:
+                        break
+                    total += len(batch)
+            finally:
+                _put_or_abort(None)
+            
+            # Surface any insert error in the caller
+            inserter.result()
+        
+        # The in-memory corpus for this directory is now stale
+        self._corpus_cache.pop(persist_dir, None)
+        return total
+
+    def _embed_texts_cached(self, texts: List[str], cache_dir: pathlib.Path) -> List[Any]:
+        """Embed texts, reusing vectors cached on disk from earlier runs.
+
+        OSHA content changes rarely, so vectors are stored per chunk under a
+        blake2b content hash; re-ingesting unchanged content loads small .npy
+        files instead of re-calling Ollama for every chunk.
+        """
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        keys = [
+            hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            for text in texts
+        ]
+        vectors: List[Any] = [None] * len(texts)
+        missing = []
+        
+        for i, key in enumerate(keys):
+            cache_path = cache_dir / f"{key}.npy"
+            if cache_path.exists():
+                vectors[i] = np.load(cache_path).tolist()
+            else:
+                missing.append(i)
+        
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+                np.save(cache_dir / f"{keys[i]}.npy", np.asarray(vector, dtype=np.float32))
+        
+        return vectors
+
+    async def _astore_chunks(self, chunks: Iterable[Document], batch_size: int = 250) -> int:
+        """Stream embedded batches to a Chroma server with overlapping adds.
+
+        The embedded PersistentClient blocks on the SQLite commit of every
+        add; against a server process several adds can be in flight at once,
+        hiding disk-commit latency behind network queueing.
+        """
+        client = await chromadb.AsyncHttpClient(host=self.chroma_host, port=self.chroma_port)
+        collection = await client.get_or_create_collection(
+            self.COLLECTION_NAME,
+            metadata={"hnsw:space": "cosine"}
         )
-        vectorstore.persist()
         
-        print(f"Successfully ingested {len(chunks)} chunks into {persist_dir}")
-        return persist_dir
+        try:
+            max_batch = await client.get_max_batch_size()
+        except Exception:
+            max_batch = 128
+        
+        semaphore = asyncio.Semaphore(8)
+        
+        async def _add(batch: Dict[str, Any]) -> None:
+            async with semaphore:
+                for i in range(0, len(batch["ids"]), max_batch):
+                    await collection.add(**{
+                        key: values[i:i + max_batch]
+                        for key, values in batch.items()
+                    })
+        
+        pending = []
+        chunk_iter = iter(chunks)
+        total = 0
+        while True:
+            batch = list(itertools.islice(chunk_iter, batch_size))
+            if not batch:
+                break
+            texts = [chunk.page_content for chunk in batch]
+            batch_embeddings = await asyncio.to_thread(
+                self.embeddings.embed_documents, texts
+            )
+            pending.append(asyncio.ensure_future(_add({
+                "ids": [self._chunk_id(text, total + i) for i, text in enumerate(texts)],
+                "documents": texts,
+                "metadatas": [_sanitize_metadata(chunk.metadata) for chunk in batch],
+                "embeddings": batch_embeddings
+            })))
+            total += len(batch)
+        
+        await asyncio.gather(*pending)
+        return total
+
+    @staticmethod
+    def _chunk_id(text: str, index: int) -> str:
+        """Build a deterministic Chroma id from chunk content and position."""
+        return hashlib.blake2b(f"{text}{index}".encode(), digest_size=16).hexdigest()
 
     def search_osha_documents(self, query: str, persist_dir: str = None, k: int = 5) -> List[Document]:
         """Search OSHA documents in the vector database."""
         if persist_dir is None:
-            persist_dir = VectorDBPath or "./osha_vector_db"
-        
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
+            persist_dir = _get_vector_db_path() or "./osha_vector_db"
         
         try:
-            vectorstore = Chroma(
-                persist_directory=persist_dir,
-                embedding_function=embeddings
-            )
+            vectorstore = self._vectorstore_cache.get(persist_dir)
+            if vectorstore is None:
+                vectorstore = Chroma(
+                    persist_directory=persist_dir,
+                    embedding_function=self.embeddings,
+                    collection_name=self.COLLECTION_NAME
+                )
+                self._vectorstore_cache[persist_dir] = vectorstore
             
             results = vectorstore.similarity_search(query, k=k)
             return results
@@ -285,6 +708,72 @@ class OSHADocumentProcessor:
             print(f"Error searching documents: {e}")
             return []
 
+    @functools.lru_cache(maxsize=1024)
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query once and cache the vector for repeated searches."""
+        return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
+    def _load_corpus(self, persist_dir: str):
+        """Load the collection's vectors and documents into memory once."""
+        cached = self._corpus_cache.get(persist_dir)
+        if cached is not None:
+            return cached
+        
+        client = chromadb.PersistentClient(path=persist_dir)
+        collection = client.get_or_create_collection(
+            self.COLLECTION_NAME,
+            metadata={"hnsw:space": "cosine"}
+        )
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        
+        vectors = data.get("embeddings")
+        if vectors is None or not len(vectors):
+            self._corpus_cache[persist_dir] = (None, [])
+            return self._corpus_cache[persist_dir]
+        
+        # Normalize rows so cosine similarity reduces to a dot product
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        
+        documents = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+        
+        self._corpus_cache[persist_dir] = (matrix, documents)
+        return self._corpus_cache[persist_dir]
+
+    def search_osha_documents_numpy(self, query: str, persist_dir: str = None, k: int = 5) -> List[Document]:
+        """Brute-force similarity search over an in-memory corpus.
+
+        For small collections a single BLAS matrix-vector product over
+        normalized vectors beats reopening the HNSW index, and repeated
+        queries hit the cached query embedding instead of calling Ollama.
+        """
+        if persist_dir is None:
+            persist_dir = _get_vector_db_path() or "./osha_vector_db"
+        
+        try:
+            matrix, documents = self._load_corpus(persist_dir)
+            if matrix is None:
+                return []
+            
+            query_vector = self._embed_query(query)
+            norm = np.linalg.norm(query_vector)
+            if norm:
+                query_vector = query_vector / norm
+            
+            scores = matrix @ query_vector
+            k = min(k, len(documents))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [documents[i] for i in top]
+        except Exception as e:
+            print(f"Error searching documents: {e}")
+            return []
+
     def get_processing_capabilities(self) -> Dict[str, Any]:
         """Get information about available processing capabilities."""
         return {
@@ -4,70 +4,86 @@ DocumentAgent Dependency Installer
 Installs all required packages for the DocumentAgent project
 """
 
+import logging
+import shlex
 import subprocess
 import sys
 import os
 
+# One interpreter-bound pip invocation: avoids PATH lookup surprises and
+# skips pip's own version handshake on every call
+PIP = f"{shlex.quote(sys.executable)} -m pip --disable-pip-version-check --no-python-version-warning"
+
+# message-only format keeps the installer output looking like before
+# while letting callers gate verbosity with the standard level knobs
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
 def run_command(command, description):
     """Run a command and handle errors."""
-    print(f"🔄 {description}...")
+    logger.info("🔄 %s...", description)
     try:
         result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(f"✅ {description} completed successfully")
+        logger.info("✅ %s completed successfully", description)
         return True
     except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed:")
-        print(f"   Error: {e.stderr}")
+        logger.error("❌ %s failed:", description)
+        logger.error("   Error: %s", e.stderr)
         return False
 
 def check_python_version():
     """Check if Python version is compatible."""
     version = sys.version_info
     if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print("❌ Python 3.8 or higher is required")
-        print(f"   Current version: {version.major}.{version.minor}.{version.micro}")
+        logger.error("❌ Python 3.8 or higher is required")
+        logger.error("   Current version: %d.%d.%d", version.major, version.minor, version.micro)
         return False
-    print(f"✅ Python {version.major}.{version.minor}.{version.micro} detected")
+    logger.info("✅ Python %d.%d.%d detected", version.major, version.minor, version.micro)
     return True
 
 def install_dependencies():
     """Install all required dependencies."""
-    print("🚀 Installing DocumentAgent dependencies...")
-    print("=" * 50)
+    logger.info("🚀 Installing DocumentAgent dependencies...")
+    logger.info("=" * 50)
     
     # Check Python version
     if not check_python_version():
         return False
     
     # Install core dependencies
-    if not run_command("pip install --upgrade pip", "Upgrading pip"):
+    if not run_command(f"{PIP} install --upgrade pip", "Upgrading pip"):
         return False
     
     # Install requirements
     if os.path.exists("requirements.txt"):
-        if not run_command("pip install -r requirements.txt", "Installing requirements from requirements.txt"):
+        if not run_command(f"{PIP} install -r requirements.txt", "Installing requirements from requirements.txt"):
             return False
     else:
-        print("⚠️  requirements.txt not found, installing core packages...")
+        logger.warning("⚠️  requirements.txt not found, installing core packages...")
         core_packages = [
             "langchain>=0.3.0",
             "langchain-ollama>=0.1.0",
             "Flask>=2.3.3",
             "chromadb>=1.0.0",
             "ollama>=0.5.0",
-            "PyMuPDF>=1.23.0"
+            "PyMuPDF>=1.23.0",
+            "lxml>=5.0.0",
+            "requests-cache>=1.1.0"
         ]
-        for package in core_packages:
-            if not run_command(f"pip install {package}", f"Installing {package}"):
-                return False
+        # One pip invocation for the whole list: per-package calls pay
+        # interpreter + resolver startup each time, and joint resolution
+        # also catches version conflicts up front
+        packages = " ".join(shlex.quote(p) for p in core_packages)
+        if not run_command(f"{PIP} install {packages}", "Installing core packages"):
+            return False
     
-    print("=" * 50)
-    print("🎉 All dependencies installed successfully!")
-    print("\n📋 Next steps:")
-    print("1. Make sure Ollama is running")
-    print("2. Pull required models: ollama pull gemma3:4b nomic-embed-text")
-    print("3. Run the web app: python web_app.py")
-    print("4. Open http://localhost:5000 in your browser")
+    logger.info("=" * 50)
+    logger.info("🎉 All dependencies installed successfully!")
+    logger.info("\n📋 Next steps:")
+    logger.info("1. Make sure Ollama is running")
+    logger.info("2. Pull required models: ollama pull gemma3:4b nomic-embed-text")
+    logger.info("3. Run the web app: python web_app.py")
+    logger.info("4. Open http://localhost:5000 in your browser")
     
     return True
 
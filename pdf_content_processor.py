@@ -1,13 +1,18 @@
 # pdf_content_processor.py
 # Generic PDF content processing module
 
+import itertools
+import logging
 import os
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from pathlib import Path
 
 from langchain.schema import Document
 
+logger = logging.getLogger(__name__)
+
 try:
     import PyPDF2
     PYPDF2_AVAILABLE = True
@@ -26,6 +31,46 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
+# Modern PyMuPDF (>= 1.18) always returns str from get_text(); only ancient
+# builds ever produced generators, so gate the fallback machinery once here
+if PYMUPDF_AVAILABLE:
+    try:
+        _FITZ_RETURNS_STR = tuple(
+            int(part) for part in getattr(fitz, "__version__", "").split(".")[:2]
+        ) >= (1, 18)
+    except (ValueError, AttributeError):
+        _FITZ_RETURNS_STR = True
+else:
+    _FITZ_RETURNS_STR = False
+
+# Engine availability only depends on which imports succeeded, so compute it
+# once at import instead of per processor instance. Order reflects preference:
+# PyMuPDF is best for text extraction and metadata, pypdf2 is the basic option.
+_AVAILABLE_ENGINES = tuple(
+    engine for engine, available in (
+        ("pymupdf", PYMUPDF_AVAILABLE),
+        ("pypdf", PYPDF_AVAILABLE),
+        ("pypdf2", PYPDF2_AVAILABLE),
+    ) if available
+)
+_RECOMMENDED_ENGINE = _AVAILABLE_ENGINES[0] if _AVAILABLE_ENGINES else "none"
+
+
+def _extract_page_range(file_path: str, start_page: int, end_page: int,
+                        content_selectors: Optional[Dict[str, Any]] = None) -> List[Document]:
+    """Extract one page range in a worker process (top-level for pickling)."""
+    processor = PDFContentProcessor(preferred_engine="pymupdf")
+    
+    if content_selectors and content_selectors.get("filter_text"):
+        content_selectors = dict(content_selectors)
+        content_selectors["filter_text"] = processor._compile_text_filters(
+            content_selectors["filter_text"]
+        )
+    
+    return list(processor._iter_with_pymupdf(
+        file_path, content_selectors, max_pages=end_page, start_page=start_page
+    ))
+
 
 class PDFContentProcessor:
     """Generic PDF content processing class that can handle various PDF formats."""
@@ -38,26 +83,22 @@ class PDFContentProcessor:
             preferred_engine: "auto", "pymupdf", "pypdf", or "pypdf2"
         """
         self.preferred_engine = preferred_engine
-        self.available_engines = self._check_available_engines()
+        self.available_engines = list(_AVAILABLE_ENGINES)
+        self._selected_engine = None
         
         if not self.available_engines:
             raise ImportError(
                 "No PDF processing libraries available. "
                 "Please install one of: PyMuPDF (fitz), pypdf, or PyPDF2"
             )
-    
-    def _check_available_engines(self) -> List[str]:
-        """Check which PDF processing engines are available."""
-        engines = []
-        
-        if PYMUPDF_AVAILABLE:
-            engines.append("pymupdf")
-        if PYPDF_AVAILABLE:
-            engines.append("pypdf")
-        if PYPDF2_AVAILABLE:
-            engines.append("pypdf2")
-        
-        return engines
+        
+        # Bind the page iterator once: bulk ingest calls process_pdf per
+        # file, and the engine choice never changes after construction
+        self._iter_pages = {
+            "pymupdf": self._iter_with_pymupdf,
+            "pypdf": self._iter_with_pypdf,
+            "pypdf2": self._iter_with_pypdf2,
+        }[self._select_engine()]
     
     def get_engine_info(self) -> Dict[str, Any]:
         """Get information about available PDF processing engines."""
@@ -69,17 +110,12 @@ class PDFContentProcessor:
     
     def _get_recommended_engine(self) -> str:
         """Get the recommended engine based on availability and capabilities."""
-        if "pymupdf" in self.available_engines:
-            return "pymupdf"  # Best for text extraction and metadata
-        elif "pypdf" in self.available_engines:
-            return "pypdf"    # Good alternative
-        elif "pypdf2" in self.available_engines:
-            return "pypdf2"   # Basic functionality
-        return "none"
+        return _RECOMMENDED_ENGINE
     
     def process_pdf(self, file_path: str, 
                     content_selectors: Optional[Dict[str, Any]] = None,
-                    max_pages: Optional[int] = None) -> List[Document]:
+                    max_pages: Optional[int] = None,
+                    low_memory: bool = False) -> List[Document]:
         """
         Process a PDF file and extract content into LangChain Documents.
         
@@ -87,46 +123,148 @@ class PDFContentProcessor:
             file_path: Path to the PDF file
             content_selectors: Optional content filtering options
             max_pages: Maximum number of pages to process (None for all)
+            low_memory: Bound PyMuPDF's internal cache between pages
         
         Returns:
             List of LangChain Document objects
         """
+        return list(self.process_pdf_iter(file_path, content_selectors, max_pages,
+                                          low_memory=low_memory))
+
+    def process_pdf_iter(self, file_path: str,
+                         content_selectors: Optional[Dict[str, Any]] = None,
+                         max_pages: Optional[int] = None,
+                         low_memory: bool = False) -> Iterator[Document]:
+        """
+        Lazily process a PDF file, yielding Documents page by page.
+        
+        Streaming keeps only one page's text resident at a time, so memory
+        stays flat on large PDFs and the first Document is available after
+        page one instead of after the whole file.
+        
+        Args:
+            file_path: Path to the PDF file
+            content_selectors: Optional content filtering options
+            max_pages: Maximum number of pages to process (None for all)
+            low_memory: Bound PyMuPDF's internal glyph/image cache between
+                pages; trades a little speed for a flat RSS on image-heavy
+                PDFs (PyMuPDF engine only)
+        
+        Returns:
+            Iterator of LangChain Document objects
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         
-        # Use preferred engine or fall back to best available
-        engine = self._select_engine()
-        
-        if engine == "pymupdf":
-            return self._process_with_pymupdf(file_path, content_selectors, max_pages)
-        elif engine == "pypdf":
-            return self._process_with_pypdf(file_path, content_selectors, max_pages)
-        elif engine == "pypdf2":
-            return self._process_with_pypdf2(file_path, content_selectors, max_pages)
-        else:
-            raise RuntimeError(f"No suitable PDF engine available: {engine}")
-    
-    def _select_engine(self) -> str:
-        """Select the best available PDF processing engine."""
-        if self.preferred_engine == "auto":
-            return self._get_recommended_engine()
-        elif self.preferred_engine in self.available_engines:
-            return self.preferred_engine
-        else:
-            return self._get_recommended_engine()
+        # Compile user-supplied filter patterns once instead of per page
+        if content_selectors and content_selectors.get("filter_text"):
+            content_selectors = dict(content_selectors)
+            content_selectors["filter_text"] = self._compile_text_filters(
+                content_selectors["filter_text"]
+            )
+        
+        # Engine dispatch was resolved at construction time
+        return self._iter_pages(file_path, content_selectors, max_pages,
+                                low_memory=low_memory)
     
-    def _process_with_pymupdf(self, file_path: str, 
+    # Below this page count process-pool startup costs more than it saves
+    PARALLEL_PAGE_THRESHOLD = 16
+
+    def process_pdf_parallel(self, file_path: str,
                              content_selectors: Optional[Dict[str, Any]] = None,
-                             max_pages: Optional[int] = None) -> List[Document]:
-        """Process PDF using PyMuPDF (fitz)."""
+                             max_pages: Optional[int] = None,
+                             workers: Optional[int] = None) -> List[Document]:
+        """
+        Process a large PDF by extracting page ranges across worker processes.
+        
+        PyMuPDF text extraction is CPU-bound, so the page range is split
+        evenly over worker processes and the ordered results are merged.
+        Small files, a single worker, and non-PyMuPDF engines fall back to
+        the sequential path.
+        
+        Args:
+            file_path: Path to the PDF file
+            content_selectors: Optional content filtering options
+            max_pages: Maximum number of pages to process (None for all)
+            workers: Number of worker processes (defaults to cpu count)
+        
+        Returns:
+            List of LangChain Document objects in page order
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"PDF file not found: {file_path}")
+        
+        if self._select_engine() != "pymupdf":
+            return self.process_pdf(file_path, content_selectors, max_pages)
+        
+        doc = fitz.open(file_path)
+        total_pages = len(doc)
+        doc.close()
+        pages = min(total_pages, max_pages) if max_pages else total_pages
+        
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or pages <= self.PARALLEL_PAGE_THRESHOLD:
+            return self.process_pdf(file_path, content_selectors, max_pages)
+        
+        range_size = -(-pages // workers)  # ceiling division
+        ranges = [
+            (start, min(start + range_size, pages))
+            for start in range(0, pages, range_size)
+        ]
+        
         documents = []
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(_extract_page_range, file_path, start, end, content_selectors)
+                for start, end in ranges
+            ]
+            # Collect in submit order to keep pages ordered
+            for future in futures:
+                documents.extend(future.result())
         
+        return documents
+
+    def _select_engine(self) -> str:
+        """Select the best available PDF processing engine (cached per instance)."""
+        if self._selected_engine is None:
+            if (self.preferred_engine != "auto"
+                    and self.preferred_engine in self.available_engines):
+                self._selected_engine = self.preferred_engine
+            else:
+                self._selected_engine = _RECOMMENDED_ENGINE
+        return self._selected_engine
+    
+    def _iter_with_pymupdf(self, file_path: str, 
+                           content_selectors: Optional[Dict[str, Any]] = None,
+                           max_pages: Optional[int] = None,
+                           start_page: int = 0,
+                           low_memory: bool = False) -> Iterator[Document]:
+        """Process PDF using PyMuPDF (fitz), yielding one page at a time."""
         try:
             doc = fitz.open(file_path)
+        except Exception as e:
+            logger.warning("Error opening PDF with PyMuPDF: %s (file: %s)", e, file_path)
+            return
+        
+        if low_memory:
+            # Cap MuPDF's shared glyph/image store; otherwise it grows
+            # unboundedly across pages of image-heavy PDFs
+            try:
+                fitz.TOOLS.set_store_maxsize(64 << 20)
+            except Exception:
+                pass
+        
+        # try/finally so early generator termination still closes the handle
+        try:
+            base_metadata = {
+                "source": file_path,
+                "type": "pdf_page",
+                "engine": "pymupdf"
+            }
             total_pages = len(doc)
             pages_to_process = min(total_pages, max_pages) if max_pages else total_pages
             
-            for page_num in range(pages_to_process):
+            for page_num in range(start_page, pages_to_process):
                 try:
                     page = doc.load_page(page_num)
                     
@@ -135,22 +273,22 @@ class PDFContentProcessor:
                     
                     if text and text.strip():
                         # Extract page metadata
-                        page_metadata = self._extract_page_metadata(page, page_num, file_path)
+                        page_metadata = self._extract_page_metadata(page, page_num, base_metadata)
                         
                         # Apply content selectors if specified
                         if content_selectors and content_selectors.get("filter_text"):
                             text = self._apply_text_filters(text, content_selectors["filter_text"])
                         
-                        documents.append(Document(
+                        yield Document(
                             page_content=text,
                             metadata=page_metadata
-                        ))
+                        )
                     
                     # Extract images if requested
                     if content_selectors and content_selectors.get("extract_images", False):
                         image_info = self._extract_image_info(page)
                         if image_info:
-                            documents.append(Document(
+                            yield Document(
                                 page_content=f"Page {page_num + 1} contains {len(image_info)} images",
                                 metadata={
                                     "source": file_path,
@@ -159,30 +297,32 @@ class PDFContentProcessor:
                                     "image_count": len(image_info),
                                     "images": image_info
                                 }
-                            ))
+                            )
                 except Exception as page_error:
-                    print(f"Warning: Error processing page {page_num + 1}: {page_error}")
+                    logger.debug("Error processing page %d: %s", page_num + 1, page_error)
                     continue
-            
+                finally:
+                    if low_memory:
+                        # Drop the page reference and flush unreferenced
+                        # cache entries before loading the next page
+                        page = None
+                        fitz.TOOLS.store_shrink(100)
+        finally:
             doc.close()
-            
-        except Exception as e:
-            print(f"Warning: Error processing PDF with PyMuPDF: {e}")
-            print(f"File: {file_path}, Page: {page_num if 'page_num' in locals() else 'unknown'}")
-            # Continue processing other pages instead of failing completely
-            return documents
-        
-        return documents
     
-    def _process_with_pypdf(self, file_path: str,
-                           content_selectors: Optional[Dict[str, Any]] = None,
-                           max_pages: Optional[int] = None) -> List[Document]:
-        """Process PDF using pypdf."""
-        documents = []
-        
+    def _iter_with_pypdf(self, file_path: str,
+                         content_selectors: Optional[Dict[str, Any]] = None,
+                         max_pages: Optional[int] = None,
+                         low_memory: bool = False) -> Iterator[Document]:
+        """Process PDF using pypdf, yielding one page at a time.
+
+        low_memory is accepted for signature parity with the PyMuPDF
+        iterator; pypdf keeps no cross-page cache to bound.
+        """
         try:
             with open(file_path, 'rb') as file:
                 reader = pypdf.PdfReader(file)
+                base_metadata = self._base_document_metadata(reader, file_path)
                 total_pages = len(reader.pages)
                 pages_to_process = min(total_pages, max_pages) if max_pages else total_pages
                 
@@ -191,31 +331,33 @@ class PDFContentProcessor:
                     text = page.extract_text()
                     
                     if text.strip():
-                        page_metadata = self._extract_basic_metadata(reader, page_num, file_path)
+                        page_metadata = {**base_metadata, "page_number": page_num + 1}
                         
                         # Apply content selectors if specified
                         if content_selectors and content_selectors.get("filter_text"):
                             text = self._apply_text_filters(text, content_selectors["filter_text"])
                         
-                        documents.append(Document(
+                        yield Document(
                             page_content=text,
                             metadata=page_metadata
-                        ))
+                        )
                         
         except Exception as e:
             raise RuntimeError(f"Error processing PDF with pypdf: {e}")
-        
-        return documents
     
-    def _process_with_pypdf2(self, file_path: str,
-                            content_selectors: Optional[Dict[str, Any]] = None,
-                            max_pages: Optional[int] = None) -> List[Document]:
-        """Process PDF using PyPDF2."""
-        documents = []
-        
+    def _iter_with_pypdf2(self, file_path: str,
+                          content_selectors: Optional[Dict[str, Any]] = None,
+                          max_pages: Optional[int] = None,
+                          low_memory: bool = False) -> Iterator[Document]:
+        """Process PDF using PyPDF2, yielding one page at a time.
+
+        low_memory is accepted for signature parity with the PyMuPDF
+        iterator; PyPDF2 keeps no cross-page cache to bound.
+        """
         try:
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
+                base_metadata = self._base_document_metadata(reader, file_path)
                 total_pages = len(reader.pages)
                 pages_to_process = min(total_pages, max_pages) if max_pages else total_pages
                 
@@ -224,30 +366,28 @@ class PDFContentProcessor:
                     text = page.extract_text()
                     
                     if text.strip():
-                        page_metadata = self._extract_basic_metadata(reader, page_num, file_path)
+                        page_metadata = {**base_metadata, "page_number": page_num + 1}
                         
                         # Apply content selectors if specified
                         if content_selectors and content_selectors.get("filter_text"):
                             text = self._apply_text_filters(text, content_selectors["filter_text"])
                         
-                        documents.append(Document(
+                        yield Document(
                             page_content=text,
                             metadata=page_metadata
-                        ))
+                        )
                         
         except Exception as e:
             raise RuntimeError(f"Error processing PDF with PyPDF2: {e}")
-        
-        return documents
     
-    def _extract_page_metadata(self, page, page_num: int, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from a PyMuPDF page."""
-        metadata = {
-            "source": file_path,
-            "page_number": page_num + 1,
-            "type": "pdf_page",
-            "engine": "pymupdf"
-        }
+    def _extract_page_metadata(self, page, page_num: int,
+                               base_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract metadata from a PyMuPDF page.
+
+        base_metadata holds the per-file fields hoisted out of the page
+        loop; only the page-specific keys are set here.
+        """
+        metadata = {**base_metadata, "page_number": page_num + 1}
         
         # Extract page dimensions
         rect = page.rect
@@ -257,35 +397,32 @@ class PDFContentProcessor:
         # Extract page rotation
         metadata["rotation"] = page.rotation
         
-        # Extract page annotations if any (avoid len() on generators)
+        # Count annotations without visiting each one: annot_names()
+        # returns a plain list on modern PyMuPDF, so len() is cheap even
+        # on form-heavy pages
         try:
-            annotations_iter = page.annots()
-            if annotations_iter is not None:
-                try:
-                    # Some versions return an iterator/generator
-                    annotation_count = 0
-                    for _ in annotations_iter:
-                        annotation_count += 1
-                except TypeError:
-                    # Fallback to attribute-based iteration
-                    annotation_count = 0
-                    annot = getattr(page, "first_annot", None)
-                    while annot is not None:
-                        annotation_count += 1
-                        annot = getattr(annot, "next", None)
-                if annotation_count > 0:
-                    metadata["annotation_count"] = annotation_count
+            try:
+                annotation_count = len(page.annot_names())
+            except AttributeError:
+                # Older builds: fall back to iterating the annots() generator
+                annotation_count = sum(1 for _ in (page.annots() or ()))
+            if annotation_count > 0:
+                metadata["annotation_count"] = annotation_count
         except Exception:
             # If annotations cannot be read, skip silently
             pass
         
         return metadata
     
-    def _extract_basic_metadata(self, reader, page_num: int, file_path: str) -> Dict[str, Any]:
-        """Extract basic metadata from a PDF page."""
+    def _base_document_metadata(self, reader, file_path: str) -> Dict[str, Any]:
+        """Build the per-file metadata shared by every page of a PDF.
+
+        Document-level fields are identical across pages, so reading them
+        once per file and copying per page avoids re-reading the PDF info
+        dictionary inside the page loop.
+        """
         metadata = {
             "source": file_path,
-            "page_number": page_num + 1,
             "type": "pdf_page"
         }
         
@@ -325,25 +462,50 @@ class PDFContentProcessor:
         
         return image_info
     
+    @staticmethod
+    def _compile_text_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Compile user-supplied filter patterns once per process_pdf call.
+
+        Across a long PDF the same patterns are applied to every page;
+        compiling up front (and collapsing the exclude patterns into one
+        alternation) avoids redundant regex compilation in the page loop.
+        """
+        compiled = {
+            "include": [
+                re.compile(pattern, re.IGNORECASE)
+                for pattern in filters.get("include_patterns", [])
+            ],
+            "exclude": None,
+            "max_length": filters.get("max_length")
+        }
+        
+        exclude_patterns = filters.get("exclude_patterns", [])
+        if exclude_patterns:
+            compiled["exclude"] = re.compile(
+                "|".join(f"(?:{pattern})" for pattern in exclude_patterns),
+                re.IGNORECASE
+            )
+        
+        return compiled
+
     def _apply_text_filters(self, text: str, filters: Dict[str, Any]) -> str:
-        """Apply text filtering based on content selectors."""
+        """Apply pre-compiled text filters from _compile_text_filters."""
         filtered_text = text
         
         # Apply regex filters
-        if "include_patterns" in filters:
-            for pattern in filters["include_patterns"]:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                if matches:
-                    filtered_text = "\n".join(matches)
+        for pattern in filters["include"]:
+            matches = pattern.findall(text)
+            if matches:
+                filtered_text = "\n".join(matches)
         
-        # Apply exclude patterns
-        if "exclude_patterns" in filters:
-            for pattern in filters["exclude_patterns"]:
-                filtered_text = re.sub(pattern, "", filtered_text, flags=re.IGNORECASE)
+        # Apply exclude patterns in a single alternation pass
+        if filters["exclude"] is not None:
+            filtered_text = filters["exclude"].sub("", filtered_text)
         
         # Apply length limits
-        if "max_length" in filters and len(filtered_text) > filters["max_length"]:
-            filtered_text = filtered_text[:filters["max_length"]] + "..."
+        max_length = filters["max_length"]
+        if max_length is not None and len(filtered_text) > max_length:
+            filtered_text = filtered_text[:max_length] + "..."
         
         return filtered_text
     
@@ -369,12 +531,16 @@ class PDFContentProcessor:
                 try:
                     first_page = doc.load_page(0)
                     sample_text = first_page.get_text()
-                    if hasattr(sample_text, '__iter__') and not isinstance(sample_text, str):
-                        info["text_type"] = "generator"
-                        info["text_sample"] = " ".join(list(sample_text)[:100]) + "..."
-                    else:
+                    if isinstance(sample_text, str):
+                        # Modern fitz: plain string, slice directly
                         info["text_type"] = "string"
-                        info["text_sample"] = str(sample_text)[:100] + "..."
+                        info["text_sample"] = sample_text[:100] + "..."
+                    else:
+                        # Legacy fitz generator: take the first items only
+                        info["text_type"] = "generator"
+                        info["text_sample"] = " ".join(
+                            itertools.islice((str(t) for t in sample_text), 100)
+                        ) + "..."
                 except Exception as text_error:
                     info["text_extraction_error"] = str(text_error)
                 
@@ -394,6 +560,14 @@ class PDFContentProcessor:
 
     def _extract_text_from_page(self, page) -> str:
         """Extract text from a PyMuPDF page with fallback methods."""
+        if _FITZ_RETURNS_STR:
+            # Single call on modern PyMuPDF - no generator handling needed
+            try:
+                return page.get_text("text") or ""
+            except Exception as e:
+                logger.debug("Error extracting text from page: %s", e)
+                return ""
+        
         try:
             # Try the standard method first
             text = page.get_text()
@@ -403,13 +577,13 @@ class PDFContentProcessor:
                 try:
                     text = " ".join(text)
                 except Exception as join_error:
-                    print(f"Warning: Error joining generator text: {join_error}")
+                    logger.debug("Error joining generator text: %s", join_error)
                     # Try to convert generator to list first
                     try:
                         text_list = list(text)
                         text = " ".join(str(item) for item in text_list if item)
                     except Exception as list_error:
-                        print(f"Warning: Error converting generator to list: {list_error}")
+                        logger.debug("Error converting generator to list: %s", list_error)
                         text = ""
             
             if text and text.strip():
@@ -424,7 +598,7 @@ class PDFContentProcessor:
                 if text and text.strip():
                     return text
             except Exception as fallback_error:
-                print(f"Warning: Fallback text extraction failed: {fallback_error}")
+                logger.debug("Fallback text extraction failed: %s", fallback_error)
             
             # Fallback: try block extraction
             try:
@@ -439,12 +613,12 @@ class PDFContentProcessor:
                     if text_parts:
                         return " ".join(text_parts)
             except Exception as block_error:
-                print(f"Warning: Block extraction failed: {block_error}")
+                logger.debug("Block extraction failed: %s", block_error)
             
             return ""
             
         except Exception as e:
-            print(f"Warning: Error extracting text from page: {e}")
+            logger.debug("Error extracting text from page: %s", e)
             return ""
 
 
@@ -8,23 +8,37 @@ import os
 import sys
 import subprocess
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 def check_package(package_name):
     """Check if a package is installed."""
     return importlib.util.find_spec(package_name) is not None
 
 def check_ollama_connection():
-    """Check if Ollama is running and accessible."""
+    """Check if Ollama is running and the app's models are available."""
     try:
         import ollama
-        # Try to list models to check connection
-        models = ollama.list()
-        print(f"✓ Ollama connected - Found {len(models['models'])} models")
-        return True
+        # Confirm the server answers at all before probing models, so a
+        # down Ollama is reported as a connection failure instead of
+        # being mistaken for missing models
+        ollama.ps()
     except Exception as e:
         print(f"✗ Ollama connection failed: {e}")
         print("Make sure Ollama is running and accessible")
         return False
+    
+    # ollama.show is a cheap metadata lookup, unlike ollama.list()
+    # which enumerates every stored blob — and it verifies the exact
+    # models the app will use
+    for model in ("nomic-embed-text", "gemma3:4b"):
+        try:
+            ollama.show(model)
+            print(f"✓ Ollama connected - model '{model}' available")
+            return True
+        except Exception:
+            continue
+    print("✗ Ollama reachable but neither 'nomic-embed-text' nor 'gemma3:4b' is available")
+    return False
 
 def check_required_packages():
     """Check if all required packages are installed."""
@@ -73,12 +87,21 @@ def main():
     
     print(f"✓ Python {sys.version.split()[0]} detected")
     
-    # Check packages
-    if not check_required_packages():
+    # Run the independent checks concurrently: the Ollama probe alone can
+    # take seconds, so startup cost becomes the slowest check rather than
+    # the sum of all of them
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        packages_future = executor.submit(check_required_packages)
+        ollama_future = executor.submit(check_ollama_connection)
+        directories_future = executor.submit(create_directories)
+        packages_ok = packages_future.result()
+        ollama_ok = ollama_future.result()
+        directories_future.result()
+    
+    if not packages_ok:
         sys.exit(1)
     
-    # Check Ollama
-    if not check_ollama_connection():
+    if not ollama_ok:
         print("\nTo start Ollama:")
         print("1. Install Ollama from https://ollama.ai/")
         print("2. Run: ollama serve")
@@ -86,9 +109,6 @@ def main():
         print("4. Pull embeddings: ollama pull nomic-embed-text")
         sys.exit(1)
     
-    # Create directories
-    create_directories()
-    
     # Check if web app file exists
     if not os.path.exists('web_app.py'):
         print("✗ web_app.py not found")
@@ -4,17 +4,26 @@ DocumentAgent Web Application
 A web interface for uploading PDFs, processing them, and chatting with the content using Ollama.
 """
 
+import functools
+import hashlib
 import os
-import tempfile
+import re
+import threading
+import time
 import uuid
 from pathlib import Path
 from typing import List, Dict, Any
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
 
+import chromadb
+import ollama
+
 from pdf_content_processor import PDFContentProcessor
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
@@ -43,33 +52,116 @@ pdf_processor = PDFContentProcessor()
 embeddings = OllamaEmbeddings(model="nomic-embed-text")
 llm = OllamaLLM(model="gemma3:4b")  # Using the model you have installed
 
+def _warm_ollama_models():
+    """Preload both models so the first request doesn't pay a cold load.
+
+    keep_alive pins the weights in VRAM past Ollama's idle-unload window;
+    failures are non-fatal so the app still starts while Ollama is down.
+    """
+    try:
+        ollama.generate(model="gemma3:4b", prompt="", keep_alive="30m")
+        ollama.embeddings(model="nomic-embed-text", prompt="warmup", keep_alive="30m")
+        print("Ollama models preloaded")
+    except Exception as e:
+        print(f"Model warmup skipped: {e}")
+
+_warm_ollama_models()
+
+# Background ingest pool: PDF parsing plus embedding takes tens of
+# seconds for large files, which would head-of-line-block every other
+# request on the single dev server. Two workers let concurrent uploads
+# overlap their embed calls against Ollama.
+EXECUTOR = ThreadPoolExecutor(max_workers=2)
+JOBS: Dict[str, Any] = {}
+
+# Built once: splitter construction re-compiled its separator handling
+# on every upload when it lived inside process_and_store_pdf
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=1000,
+    chunk_overlap=200,
+    separators=["\n\n", "\n", ". ", " ", ""]
+)
+
+# Server-side chat histories keyed by a per-client session id. Keeping
+# the history out of Flask's signed cookie means responses no longer
+# base64-encode multi-KB transcripts into every Set-Cookie (and can't
+# overflow the 4KB cookie limit).
+CHAT_HISTORIES: Dict[str, List[Dict[str, str]]] = {}
+
+def _session_history() -> List[Dict[str, str]]:
+    """Return this client's chat history, creating the session id lazily."""
+    sid = session.get('sid')
+    if sid is None:
+        sid = str(uuid.uuid4())
+        session['sid'] = sid
+    return CHAT_HISTORIES.setdefault(sid, [])
+
 # Initialize conversation memory
 conversation_memory = ConversationBufferMemory(
     memory_key="chat_history",
     return_messages=True
 )
 
+# Per-file chunk counters kept in-process so /documents doesn't have to
+# ship every metadata dict out of Chroma on each page refresh; rebuilt
+# lazily from the collection once per process
+FILE_CHUNK_COUNTS = defaultdict(int)
+FILE_UPLOAD_TIME = {}
+_counters_lock = threading.Lock()
+_counters_loaded = False
+
+def _ensure_file_counters():
+    """Rebuild the per-file counters from the collection, once per process."""
+    global _counters_loaded
+    if _counters_loaded:
+        return
+    with _counters_lock:
+        if _counters_loaded:
+            return
+        try:
+            collection = get_vectorstore()._collection
+            data = collection.get(include=["metadatas"])
+            for metadata in data.get("metadatas") or []:
+                if metadata and 'original_filename' in metadata:
+                    filename = metadata['original_filename']
+                    FILE_CHUNK_COUNTS[filename] += 1
+                    FILE_UPLOAD_TIME.setdefault(
+                        filename, metadata.get('uploaded_at', 'Unknown')
+                    )
+        except Exception as e:
+            print(f"Error rebuilding document counters: {e}")
+        _counters_loaded = True
+
+def _process_upload_job(tmp_path: str, filename: str) -> Dict[str, Any]:
+    """Background upload job: process the PDF, then remove the saved file."""
+    try:
+        return process_and_store_pdf(tmp_path, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@functools.lru_cache(maxsize=1)
 def get_vectorstore():
-    """Get or create the vector store."""
-    try:
-        # Try to load existing vector store
-        vectorstore = Chroma(
-            persist_directory=VECTOR_DB_PATH,
-            embedding_function=embeddings
-        )
-        # Check if it has documents
-        if vectorstore._collection.count() > 0:
-            return vectorstore
-    except Exception:
-        pass
-    
-    # Create new vector store if none exists
+    """Get the shared vector store, created once per process.
+
+    Every upload, chat, list and delete request calls this; rebuilding the
+    Chroma client each time reopened the on-disk index and reloaded HNSW
+    metadata on the hot path. One cached instance pays that cost once.
+    """
+    client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    # "langchain" is the collection name the old persist_directory-based
+    # constructor used, so existing databases keep working
+    client.get_or_create_collection(
+        name="langchain",
+        metadata={"hnsw:space": "cosine"}
+    )
     return Chroma(
-        persist_directory=VECTOR_DB_PATH,
+        client=client,
+        collection_name="langchain",
         embedding_function=embeddings
     )
 
@@ -83,41 +175,107 @@ def process_and_store_pdf(file_path: str, filename: str) -> Dict[str, Any]:
             return {"success": False, "error": "No content extracted from PDF"}
         
         # Split documents into chunks
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        chunks = splitter.split_documents(documents)
+        chunks = TEXT_SPLITTER.split_documents(documents)
         
         # Add metadata
+        uploaded_at = datetime.now().isoformat()
         for chunk in chunks:
             chunk.metadata.update({
-                "uploaded_at": datetime.now().isoformat(),
+                "uploaded_at": uploaded_at,
                 "original_filename": filename,
                 "file_id": str(uuid.uuid4())
             })
         
-        # Store in vector database
-        vectorstore = get_vectorstore()
-        vectorstore.add_documents(chunks)
-        vectorstore.persist()
+        collection = get_vectorstore()._collection
+        # Rebuild the counters before inserting: doing it afterwards would
+        # count the chunks we are about to add and then add them again below
+        _ensure_file_counters()
+        
+        # Stable content-hash ids make re-uploads idempotent: chunks the
+        # collection already holds are skipped before embedding, which is
+        # the expensive step
+        ids = [
+            hashlib.sha256(chunk.page_content.encode()).hexdigest()
+            for chunk in chunks
+        ]
+        try:
+            existing = set(collection.get(ids=list(set(ids)), include=[])["ids"])
+        except Exception:
+            existing = set()
+        
+        seen = set(existing)
+        new_ids = []
+        new_chunks = []
+        for chunk_id, chunk in zip(ids, chunks):
+            if chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+            new_ids.append(chunk_id)
+            new_chunks.append(chunk)
+        
+        if new_chunks:
+            # Embed only the missing chunks in one batched request instead
+            # of letting add_documents issue one Ollama call per chunk
+            texts = [chunk.page_content for chunk in new_chunks]
+            vectors = embeddings.embed_documents(texts)
+            metadatas = [chunk.metadata for chunk in new_chunks]
+            
+            # Chroma rejects inserts above its max batch size (e.g. "Batch
+            # size 367 exceeds maximum batch size 166" on long PDFs), so
+            # write in right-sized sub-batches
+            try:
+                max_batch = collection._client.get_max_batch_size()
+            except Exception:
+                max_batch = 128
+            for i in range(0, len(texts), max_batch):
+                collection.upsert(
+                    ids=new_ids[i:i + max_batch],
+                    embeddings=vectors[i:i + max_batch],
+                    documents=texts[i:i + max_batch],
+                    metadatas=metadatas[i:i + max_batch]
+                )
+        
+        with _counters_lock:
+            FILE_CHUNK_COUNTS[filename] += len(new_chunks)
+            FILE_UPLOAD_TIME[filename] = uploaded_at
+        
+        skipped = len(chunks) - len(new_chunks)
+        message = f"Successfully processed {len(new_chunks)} chunks from {filename}"
+        if skipped:
+            message += f" ({skipped} duplicate chunks skipped)"
         
         return {
             "success": True,
-            "chunks_created": len(chunks),
+            "chunks_created": len(new_chunks),
             "filename": filename,
-            "message": f"Successfully processed {len(chunks)} chunks from {filename}"
+            "message": message
         }
         
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# Greetings and other chit-chat that never benefits from retrieval
+_GREETING_RE = re.compile(
+    r"^(hi|hello|hey|thanks|thank you|ok|okay|bye|goodbye)[\s.!?]*$",
+    re.IGNORECASE
+)
+
+@functools.lru_cache(maxsize=256)
+def _embed_query(text: str) -> tuple:
+    """Embed a query, cached so repeated questions skip the Ollama call."""
+    return tuple(embeddings.embed_query(text))
+
+def _is_trivial_query(query: str) -> bool:
+    """Short messages and greetings go straight to the no-context prompt."""
+    return len(query.split()) < 3 or bool(_GREETING_RE.match(query.strip()))
+
 def search_documents(query: str, k: int = 5) -> List[Document]:
     """Search documents in the vector database."""
     try:
         vectorstore = get_vectorstore()
-        results = vectorstore.similarity_search(query, k=k)
+        results = vectorstore.similarity_search_by_vector(
+            list(_embed_query(query)), k=k
+        )
         return results
     except Exception as e:
         print(f"Search error: {e}")
@@ -126,8 +284,9 @@ def search_documents(query: str, k: int = 5) -> List[Document]:
 def get_chat_response(query: str, chat_history: List[Dict]) -> str:
     """Get response from Ollama using document context and general knowledge."""
     try:
-        # Search for relevant documents
-        relevant_docs = search_documents(query, k=3)
+        # Search for relevant documents; greetings and one-word messages
+        # skip the embed + kNN round-trip entirely
+        relevant_docs = [] if _is_trivial_query(query) else search_documents(query, k=3)
         
         if relevant_docs:
             # Create context from relevant documents
@@ -180,18 +339,22 @@ def upload_file():
         try:
             filename = secure_filename(file.filename)
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                file.save(tmp_file.name)
-                tmp_path = tmp_file.name
+            # Werkzeug already spools the upload; save it once into the
+            # upload folder instead of copying through a second temp file
+            tmp_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4()}.pdf")
+            file.save(tmp_path)
             
-            # Process and store PDF
-            result = process_and_store_pdf(tmp_path, filename)
-            
-            # Clean up temporary file
-            os.unlink(tmp_path)
+            # Hand processing to the background pool and return a job id
+            # the client can poll, so the request thread stays free
+            job_id = str(uuid.uuid4())
+            JOBS[job_id] = EXECUTOR.submit(_process_upload_job, tmp_path, filename)
             
-            return jsonify(result)
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "filename": filename,
+                "message": f"Processing {filename} in the background"
+            })
             
         except RequestEntityTooLarge:
             return jsonify({"success": False, "error": "File too large. Maximum size is 100MB."})
@@ -200,6 +363,23 @@ def upload_file():
     
     return jsonify({"success": False, "error": "Invalid file type. Only PDF files are allowed."})
 
+@app.route('/upload_status/<job_id>')
+def upload_status(job_id):
+    """Poll the state of a background upload job."""
+    future = JOBS.get(job_id)
+    if future is None:
+        return jsonify({"success": False, "error": "Unknown job id"})
+    
+    if not future.done():
+        return jsonify({"success": True, "status": "processing"})
+    
+    JOBS.pop(job_id, None)
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    return jsonify({"success": True, "status": "done", "result": result})
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages."""
@@ -209,15 +389,15 @@ def chat():
     if not query:
         return jsonify({"success": False, "error": "No message provided"})
     
-    # Get chat history from session
-    chat_history = session.get('chat_history', [])
+    # Get chat history from the server-side store
+    chat_history = _session_history()
     
     # Get response
     response = get_chat_response(query, chat_history)
     
-    # Update chat history
+    # Update chat history in place, keeping the last 10 messages
     chat_history.append({"user": query, "assistant": response})
-    session['chat_history'] = chat_history[-10:]  # Keep last 10 messages
+    del chat_history[:-10]
     
     return jsonify({
         "success": True,
@@ -229,38 +409,16 @@ def chat():
 def get_documents():
     """Get list of processed documents."""
     try:
-        vectorstore = get_vectorstore()
-        collection = vectorstore._collection
-        
-        # Get unique documents with actual chunk counts
-        documents = []
-        seen_files = {}
-        
-        try:
-            # Get all documents from the collection
-            all_docs = collection.get()
-            if all_docs and 'metadatas' in all_docs:
-                for i, metadata in enumerate(all_docs['metadatas']):
-                    if metadata and 'original_filename' in metadata:
-                        filename = metadata['original_filename']
-                        
-                        if filename not in seen_files:
-                            # First time seeing this file, initialize
-                            seen_files[filename] = {
-                                "filename": filename,
-                                "uploaded_at": metadata.get('uploaded_at', 'Unknown'),
-                                "chunks": 1
-                            }
-                        else:
-                            # Increment chunk count for this file
-                            seen_files[filename]["chunks"] += 1
-                
-                # Convert to list
-                documents = list(seen_files.values())
-                
-        except Exception as e:
-            print(f"Error getting documents: {e}")
-            pass
+        _ensure_file_counters()
+        with _counters_lock:
+            documents = [
+                {
+                    "filename": filename,
+                    "uploaded_at": FILE_UPLOAD_TIME.get(filename, 'Unknown'),
+                    "chunks": count
+                }
+                for filename, count in FILE_CHUNK_COUNTS.items()
+            ]
         
         return jsonify({"success": True, "documents": documents})
         
@@ -280,28 +438,24 @@ def delete_document():
         vectorstore = get_vectorstore()
         collection = vectorstore._collection
         
-        # Get all documents with this filename
-        all_docs = collection.get()
-        if not all_docs or 'metadatas' not in all_docs:
-            return jsonify({"success": False, "error": "No documents found"})
+        # Count matching chunks server-side (ids come back even with an
+        # empty include list), then delete by metadata filter in one call
+        # instead of scanning every row client-side
+        where = {"original_filename": filename}
+        deleted_count = len(collection.get(where=where, include=[])["ids"])
         
-        # Find indices of chunks to delete
-        indices_to_delete = []
-        for i, metadata in enumerate(all_docs['metadatas']):
-            if metadata and metadata.get('original_filename') == filename:
-                indices_to_delete.append(i)
-        
-        if not indices_to_delete:
+        if not deleted_count:
             return jsonify({"success": False, "error": "Document not found"})
         
-        # Delete chunks by their IDs
-        if 'ids' in all_docs:
-            ids_to_delete = [all_docs['ids'][i] for i in indices_to_delete]
-            collection.delete(ids=ids_to_delete)
+        collection.delete(where=where)
+        
+        with _counters_lock:
+            FILE_CHUNK_COUNTS.pop(filename, None)
+            FILE_UPLOAD_TIME.pop(filename, None)
         
         return jsonify({
             "success": True, 
-            "message": f"Successfully deleted {len(indices_to_delete)} chunks from {filename}"
+            "message": f"Successfully deleted {deleted_count} chunks from {filename}"
         })
         
     except Exception as e:
@@ -310,18 +464,30 @@ def delete_document():
 @app.route('/clear_chat', methods=['POST'])
 def clear_chat():
     """Clear chat history."""
-    session['chat_history'] = []
+    CHAT_HISTORIES.pop(session.get('sid'), None)
     return jsonify({"success": True, "message": "Chat history cleared"})
 
+_health_cache = {"time": 0.0, "payload": None}
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
+    # ollama.show is a metadata lookup: unlike the old llm.invoke("test")
+    # it neither loads gemma3:4b into VRAM nor waits on a generation. The
+    # 1s memo keeps tight liveness-probe loops from hammering Ollama.
+    now = time.monotonic()
+    if _health_cache["payload"] is not None and now - _health_cache["time"] < 1.0:
+        return jsonify(_health_cache["payload"])
+    
     try:
-        # Check if Ollama is accessible
-        llm.invoke("test")
-        return jsonify({"status": "healthy", "ollama": "connected"})
+        ollama.show("gemma3:4b")
+        payload = {"status": "healthy", "ollama": "connected"}
     except Exception as e:
-        return jsonify({"status": "unhealthy", "ollama": "disconnected", "error": str(e)})
+        payload = {"status": "unhealthy", "ollama": "disconnected", "error": str(e)}
+    
+    _health_cache["time"] = now
+    _health_cache["payload"] = payload
+    return jsonify(payload)
 
 if __name__ == '__main__':
     print("Starting DocumentAgent Web Application...")
@@ -1,11 +1,69 @@
 # web_content_scraper.py
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from langchain.schema import Document
+
+try:
+    from lxml import etree
+    from lxml import html as lhtml
+    LXML_AVAILABLE = True
+    BS4_PARSER = "lxml"
+    # Compiled once: the table loop evaluates these per table/row, and
+    # etree.XPath skips re-parsing the expression on every call
+    _XPATH_TR = etree.XPath(".//tr")
+    # Headers normally sit in the first row; scanning the whole table
+    # subtree for <th> is O(rows x cells) for nothing
+    _XPATH_TH = etree.XPath(".//tr[1]/th")
+    _XPATH_TD = etree.XPath(".//td")
+except ImportError:
+    LXML_AVAILABLE = False
+    BS4_PARSER = "html.parser"
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
 from typing import Optional, Dict, Any
 
 
+# Default extraction targets when callers don't pass their own selectors.
+# Links are deliberately not extracted by default: a typical page carries
+# hundreds of nav/footer anchors that would each become a Document and
+# later cost a real embedding call. Pass {"links": ["a"]} to opt in.
+DEFAULT_CONTENT_SELECTORS = {
+    "headings": ["h1", "h2", "h3", "h4", "h5", "h6"],
+    "paragraphs": ["p"],
+    "lists": ["ul", "ol"],
+    "tables": ["table"],
+    "divs": ["div"]
+}
+
+
 class WebContentScraper:
+    # Pages larger than this are refused rather than buffered into memory
+    MAX_PAGE_BYTES = 10 * 1024 * 1024
+
+    # Headings/paragraphs shorter than this are boilerplate ("Menu",
+    # "Close", ...) that isn't worth storing or embedding
+    MIN_TEXT_LEN = 20
+
+    # Parsed-tree cache entries kept per scraper; parses are only worth
+    # caching for retry/dedup paths, so the window stays small
+    _TREE_CACHE_SIZE = 32
+
     def __init__(self, base_url: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
         self.base_url = base_url
         self.headers = headers or {
@@ -17,61 +75,167 @@ class WebContentScraper:
             "Accept-Language": "en-US,en;q=0.9",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         }
+        
+        # One pooled session per scraper: keep-alive reuse avoids paying a
+        # fresh TCP + TLS handshake for every page on the same host. When
+        # requests-cache is installed, the session also caches bodies on
+        # disk and issues conditional GETs (ETag/Last-Modified), so
+        # re-ingesting unchanged pages costs one 304 round-trip
+        if REQUESTS_CACHE_AVAILABLE:
+            self.session = requests_cache.CachedSession(
+                "osha_cache", expire_after=86400, cache_control=True
+            )
+        else:
+            self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Parsed lxml trees keyed by a content digest (see _tree_for_html);
+        # the lock covers concurrent parses from thread/async workers
+        self._tree_cache = {}
+        self._tree_cache_lock = threading.Lock()
 
-    def fetch_page(self, url: str) -> tuple[str, str]:
-        """Download HTML content from a web page."""
+    def _full_url(self, url: str) -> str:
+        """Resolve a URL or path against the configured base URL."""
         if self.base_url and not url.startswith(('http://', 'https://')):
-            full_url = f"{self.base_url}{url}" if url.startswith("/") else f"{self.base_url}/{url}"
-        else:
-            full_url = url
-            
-        response = requests.get(full_url, headers=self.headers, timeout=10)
+            return f"{self.base_url}{url}" if url.startswith("/") else f"{self.base_url}/{url}"
+        return url
+
+    def fetch_page(self, url: str) -> tuple[str, str]:
+        """Download HTML content from a web page, capped at MAX_PAGE_BYTES.
+
+        Streaming into a bytearray with a hard cap bounds memory per
+        fetch; response.text would buffer however much the server sends.
+        """
+        full_url = self._full_url(url)
+        response = self.session.get(full_url, timeout=10, stream=True)
+        response.raise_for_status()
+        buf = bytearray()
+        for chunk in response.iter_content(chunk_size=65536):
+            buf.extend(chunk)
+            if len(buf) > self.MAX_PAGE_BYTES:
+                response.close()
+                raise IOError(f"Page exceeds {self.MAX_PAGE_BYTES} bytes: {full_url}")
+        encoding = response.encoding or response.apparent_encoding or "utf-8"
+        return bytes(buf).decode(encoding, errors="replace"), full_url
+
+    def _stream_page_tree(self, url: str) -> tuple:
+        """Stream a page into an incremental lxml parser.
+
+        Feeding 64 KiB chunks into the parser as they arrive keeps peak
+        memory at roughly one DOM instead of body-string plus DOM, and
+        overlaps parse work with network receive. Returns (tree, full_url).
+        """
+        full_url = self._full_url(url)
+        response = self.session.get(full_url, timeout=10, stream=True)
+        response.raise_for_status()
+        parser = lhtml.HTMLParser(recover=True)
+        fed = False
+        received = 0
+        for chunk in response.iter_content(chunk_size=65536, decode_unicode=False):
+            if chunk:
+                received += len(chunk)
+                if received > self.MAX_PAGE_BYTES:
+                    response.close()
+                    raise IOError(f"Page exceeds {self.MAX_PAGE_BYTES} bytes: {full_url}")
+                parser.feed(chunk)
+                fed = True
+        if not fed:
+            parser.feed(b"<html></html>")
+        return parser.close(), full_url
+
+    async def _afetch_page(self, client: "httpx.AsyncClient", url: str,
+                           semaphore: asyncio.Semaphore) -> tuple[str, str]:
+        """Fetch one page on a shared async client, bounded by the semaphore."""
+        full_url = self._full_url(url)
+        async with semaphore:
+            response = await client.get(full_url, timeout=15.0)
         response.raise_for_status()
         return response.text, full_url
 
-    def parse_to_documents(self, html: str, source_url: str, 
+    async def _afetch_many(self, urls: list, concurrency: int) -> list:
+        """Fetch many pages concurrently over one pooled async client."""
+        limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        semaphore = asyncio.Semaphore(concurrency)
+        async with httpx.AsyncClient(headers=self.headers, limits=limits,
+                                     follow_redirects=True) as client:
+            return await asyncio.gather(
+                *[self._afetch_page(client, url, semaphore) for url in urls]
+            )
+
+    def fetch_many(self, urls: list, concurrency: int = 10) -> list[tuple[str, str]]:
+        """Download multiple pages concurrently; returns (html, url) pairs.
+
+        Serial fetching costs one network round-trip per page; dispatching
+        them through asyncio.gather bounds wall-clock at roughly
+        len(urls)/concurrency round-trips. Falls back to sequential fetches
+        when httpx is not installed.
+        """
+        if not HTTPX_AVAILABLE:
+            return [self.fetch_page(url) for url in urls]
+        return asyncio.run(self._afetch_many(urls, concurrency))
+
+    def parse_to_documents(self, html, source_url: str, 
                           content_selectors: Optional[Dict[str, Any]] = None) -> list[Document]:
-        """Extract web page content into LangChain Documents."""
-        soup = BeautifulSoup(html, "html.parser")
-        documents = []
-        
+        """Extract web page content into LangChain Documents.
+
+        Accepts either an HTML string or an already-parsed lxml tree (as
+        produced by _stream_page_tree), so streamed fetches never have to
+        re-serialize and re-parse the page.
+        """
         # Default content selectors if none provided
         if content_selectors is None:
-            content_selectors = {
-                "headings": ["h1", "h2", "h3", "h4", "h5", "h6"],
-                "paragraphs": ["p"],
-                "lists": ["ul", "ol"],
-                "tables": ["table"],
-                "links": ["a"],
-                "divs": ["div"]
-            }
-
-        # Process headings and paragraphs
-        for tag in content_selectors.get("headings", []) + content_selectors.get("paragraphs", []):
-            for element in soup.find_all(tag):
-                text = element.get_text(strip=True)
-                if text:
+            content_selectors = DEFAULT_CONTENT_SELECTORS
+        
+        if LXML_AVAILABLE:
+            return self._parse_with_lxml(html, source_url, content_selectors)
+        return self._parse_with_bs4(html, source_url, content_selectors)
+
+    def _parse_with_lxml(self, html: str, source_url: str,
+                         content_selectors: Dict[str, Any]) -> list[Document]:
+        """Single-pass extraction via lxml XPath.
+
+        One C-level parse plus targeted XPath queries avoids re-walking the
+        DOM per tag type and the per-element bs4 Tag wrapping overhead.
+        """
+        tree = self._tree_for_html(html) if isinstance(html, str) else html
+        documents = []
+        
+        # Headings and paragraphs in one query
+        text_tags = (content_selectors.get("headings", [])
+                     + content_selectors.get("paragraphs", []))
+        if text_tags:
+            for element in tree.xpath("|".join(f"//{tag}" for tag in text_tags)):
+                text = element.text_content().strip()
+                if len(text) >= self.MIN_TEXT_LEN:
                     documents.append(
                         Document(
                             page_content=text,
                             metadata={
-                                "source": source_url, 
-                                "tag": element.name,
+                                "source": source_url,
+                                "tag": element.tag,
                                 "element_id": element.get("id", ""),
-                                "element_class": " ".join(element.get("class", []))
+                                "element_class": element.get("class") or ""
                             },
                         )
                     )
-
-        # Process lists
+        
+        # Lists
         for list_type in content_selectors.get("lists", []):
-            for idx, list_elem in enumerate(soup.find_all(list_type)):
-                list_items = [li.get_text(strip=True) for li in list_elem.find_all("li")]
+            for idx, list_elem in enumerate(tree.xpath(f"//{list_type}")):
+                list_items = [li.text_content().strip() for li in list_elem.xpath(".//li")]
+                list_items = [item for item in list_items if item]
                 if list_items:
-                    list_text = " | ".join(list_items)
                     documents.append(
                         Document(
-                            page_content=list_text,
+                            page_content=" | ".join(list_items),
                             metadata={
                                 "source": source_url,
                                 "type": "list",
@@ -80,52 +244,213 @@ class WebContentScraper:
                             },
                         )
                     )
-
-        # Process tables
-        for idx, table in enumerate(soup.find_all("table")):
-            headers = [th.get_text(strip=True) for th in table.find_all("th")]
-            for tr in table.find_all("tr"):
-                cells = [td.get_text(strip=True) for td in tr.find_all("td")]
-                if cells:
-                    row_text = " | ".join(cells)
+        
+        # Tables
+        if content_selectors.get("tables"):
+            for idx, table in enumerate(tree.xpath("//table")):
+                headers = [th.text_content().strip() for th in _XPATH_TH(table)]
+                # Rows in a table share everything but their content, so
+                # build the metadata dict once and copy per row
+                base_meta = {
+                    "source": source_url,
+                    "type": "table",
+                    "table_index": idx,
+                    "headers": headers,
+                }
+                for tr in _XPATH_TR(table):
+                    cells = [td.text_content().strip() for td in _XPATH_TD(tr)]
+                    if cells:
+                        documents.append(
+                            Document(
+                                page_content=" | ".join(cells),
+                                metadata=base_meta.copy(),
+                            )
+                        )
+        
+        # Links
+        if content_selectors.get("links"):
+            for link in tree.xpath("//a[@href]"):
+                link_text = link.text_content().strip()
+                if link_text:
                     documents.append(
                         Document(
-                            page_content=row_text,
+                            page_content=f"Link: {link_text} -> {link.get('href')}",
                             metadata={
                                 "source": source_url,
-                                "type": "table",
-                                "table_index": idx,
-                                "headers": headers,
+                                "type": "link",
+                                "href": link.get("href"),
+                                "link_text": link_text
                             },
                         )
                     )
+        
+        return documents
+
+    @staticmethod
+    def _build_strainer(content_selectors: Dict[str, Any]) -> SoupStrainer:
+        """Build a SoupStrainer covering only the tags extraction reads.
 
-        # Process links
-        for link in soup.find_all("a", href=True):
-            link_text = link.get_text(strip=True)
-            if link_text:
-                documents.append(
-                    Document(
-                        page_content=f"Link: {link_text} -> {link['href']}",
-                        metadata={
-                            "source": source_url,
-                            "type": "link",
-                            "href": link['href'],
-                            "link_text": link_text
-                        },
+        Nested content (li, tr, td, th) survives as descendants of the
+        matched containers, so only the container tags need listing.
+        """
+        tags = set(content_selectors.get("headings", []))
+        tags.update(content_selectors.get("paragraphs", []))
+        tags.update(content_selectors.get("lists", []))
+        if content_selectors.get("tables"):
+            tags.add("table")
+        if content_selectors.get("links"):
+            tags.add("a")
+        return SoupStrainer(sorted(tags))
+
+    def _parse_with_bs4(self, html: str, source_url: str,
+                        content_selectors: Dict[str, Any]) -> list[Document]:
+        """Fallback extraction via BeautifulSoup when lxml is unavailable.
+
+        One descendants pass with O(1) set dispatch per node replaces the
+        per-tag find_all calls, which each re-walked the full DOM. Results
+        come out in document order rather than grouped by tag type.
+        """
+        # Straining to the extracted tags drops script/style/nav subtrees
+        # at parse time, so those nodes are never allocated at all
+        soup = BeautifulSoup(html, BS4_PARSER,
+                             parse_only=self._build_strainer(content_selectors))
+        documents = []
+
+        text_tags = set(content_selectors.get("headings", []))
+        text_tags.update(content_selectors.get("paragraphs", []))
+        list_tags = set(content_selectors.get("lists", []))
+        want_tables = bool(content_selectors.get("tables"))
+        want_links = bool(content_selectors.get("links"))
+
+        list_index = 0
+        table_index = 0
+        for element in soup.descendants:
+            name = getattr(element, "name", None)
+            if name is None:
+                continue
+
+            if name in text_tags:
+                text = element.get_text(strip=True)
+                if len(text) >= self.MIN_TEXT_LEN:
+                    documents.append(
+                        Document(
+                            page_content=text,
+                            metadata={
+                                "source": source_url, 
+                                "tag": element.name,
+                                "element_id": element.get("id", ""),
+                                "element_class": " ".join(element.get("class", []))
+                            },
+                        )
+                    )
+            elif name in list_tags:
+                list_items = [li.get_text(strip=True) for li in element.find_all("li")]
+                if list_items:
+                    documents.append(
+                        Document(
+                            page_content=" | ".join(list_items),
+                            metadata={
+                                "source": source_url,
+                                "type": "list",
+                                "list_index": list_index,
+                                "list_type": name
+                            },
+                        )
+                    )
+                list_index += 1
+            elif name == "table" and want_tables:
+                first_tr = element.find("tr")
+                headers = [th.get_text(strip=True) for th in first_tr.find_all("th")] if first_tr else []
+                base_meta = {
+                    "source": source_url,
+                    "type": "table",
+                    "table_index": table_index,
+                    "headers": headers,
+                }
+                for tr in element.find_all("tr"):
+                    cells = [td.get_text(strip=True) for td in tr.find_all("td")]
+                    if cells:
+                        documents.append(
+                            Document(
+                                page_content=" | ".join(cells),
+                                metadata=base_meta.copy(),
+                            )
+                        )
+                table_index += 1
+            elif name == "a" and want_links and element.has_attr("href"):
+                link_text = element.get_text(strip=True)
+                if link_text:
+                    documents.append(
+                        Document(
+                            page_content=f"Link: {link_text} -> {element['href']}",
+                            metadata={
+                                "source": source_url,
+                                "type": "link",
+                                "href": element['href'],
+                                "link_text": link_text
+                            },
+                        )
                     )
-                )
 
         return documents
 
+    def _tree_for_html(self, html: str):
+        """Parse an HTML string, reusing the tree if the same payload was
+        parsed recently.
+
+        Keyed by a cheap blake2b digest so retry and dedup paths that see
+        identical HTML skip the C-level parse entirely. The cache evicts
+        oldest-first and holds at most _TREE_CACHE_SIZE trees.
+        """
+        key = hashlib.blake2b(html.encode("utf-8", "ignore"), digest_size=8).digest()
+        with self._tree_cache_lock:
+            tree = self._tree_cache.get(key)
+        if tree is None:
+            # Parse outside the lock; only cache bookkeeping is guarded
+            tree = lhtml.fromstring(html)
+            with self._tree_cache_lock:
+                if len(self._tree_cache) >= self._TREE_CACHE_SIZE:
+                    self._tree_cache.pop(next(iter(self._tree_cache)), None)
+                self._tree_cache[key] = tree
+        return tree
+
+    def fetch_and_parse_tree(self, url: str,
+                             content_selectors: Optional[Dict[str, Any]] = None) -> tuple:
+        """Fetch a page and return (documents, parsed lxml tree).
+
+        Downstream steps that need further queries (cleaning, link
+        extraction) can run XPath against the returned tree instead of
+        re-parsing the same HTML. Requires lxml.
+        """
+        if not LXML_AVAILABLE:
+            raise RuntimeError("fetch_and_parse_tree requires lxml to be installed")
+        tree, full_url = self._stream_page_tree(url)
+        return self.parse_to_documents(tree, full_url, content_selectors), tree
+
     def fetch_and_parse(self, url: str, content_selectors: Optional[Dict[str, Any]] = None) -> list[Document]:
         """Fetch web page and return LangChain Documents."""
+        if LXML_AVAILABLE:
+            tree, full_url = self._stream_page_tree(url)
+            return self.parse_to_documents(tree, full_url, content_selectors)
         html, full_url = self.fetch_page(url)
         return self.parse_to_documents(html, full_url, content_selectors)
 
+    def fetch_and_parse_many(self, urls: list, max_workers: int = 8) -> list[list[Document]]:
+        """Fetch and parse several pages concurrently.
+
+        The work is pure I/O plus parsing, so a thread pool sharing the
+        pooled session turns K serial round-trips into roughly
+        max-of-latencies. Returns one Document list per input URL, in
+        input order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.fetch_and_parse, urls))
+
     def set_custom_headers(self, headers: Dict[str, str]):
         """Set custom headers for requests."""
         self.headers.update(headers)
+        # The pooled session sends its own header set, so keep it in sync
+        self.session.headers.update(headers)
 
     def set_base_url(self, base_url: str):
         """Set or change the base URL."""